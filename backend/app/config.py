@@ -8,6 +8,9 @@ class Settings(BaseSettings):
     sui_package_id: str = os.getenv("SUI_PACKAGE_ID", "")
     sui_network: str = os.getenv("SUI_NETWORK", "testnet")
     sui_module_name: str = "registry"
+    # Mint NFTs with the backend's Sui keystore instead of having the
+    # frontend wallet sign the transaction
+    backend_signs_tx: bool = os.getenv("BACKEND_SIGNS_TX", "false").lower() == "true"
 
     # Walrus Configuration
     walrus_publisher_url: str = os.getenv(
@@ -19,23 +22,59 @@ class Settings(BaseSettings):
         "https://aggregator-devnet.walrus.space"
     )
     walrus_epochs: int = 5  # Number of epochs to store
+    upload_chunk_size: int = 1 << 20  # Bytes read per chunk when streaming uploads
+    max_concurrent_uploads: int = int(os.getenv("MAX_UPLOADS", "4"))
+    upload_dedup_size: int = 1024  # Completed uploads remembered for deduplication
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 50
+
+    # Blob Cache Configuration
+    blob_cache_dir: str = os.getenv("BLOB_CACHE_DIR", "./blob_cache")
+    blob_cache_max_bytes: int = 1 << 30  # 0 disables the download cache
 
     # OpenAI Configuration
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
+    # Must stay the same for ingest and queries; changing it needs a re-index
+    embedding_model: str = "text-embedding-ada-002"
+    embedding_batch_size: int = 96  # Chunks per embeddings request
+    embedding_concurrency: int = 8  # Embeddings requests in flight at once
 
-    # ChromaDB Configuration
+    # Vector Store Configuration
+    vector_backend: str = os.getenv("VECTOR_BACKEND", "chroma")  # "chroma" or "faiss"
     chroma_persist_directory: str = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
+    faiss_persist_directory: str = os.getenv("FAISS_PERSIST_DIR", "./faiss_db")
+    # FAISS index settings are fixed when the index is created; changing them needs a re-index.
+    # "flat" for exact search (up to ~100K chunks), "hnsw" for larger corpora
+    faiss_index_type: str = os.getenv("FAISS_INDEX_TYPE", "flat")
+    # "none", "fp16" or "int8"; quantized searches are re-ranked in float32
+    faiss_quantization: str = os.getenv("FAISS_QUANTIZATION", "none")
+    faiss_rerank_factor: int = 4  # Quantized candidates re-ranked per result
+    persist_interval: float = 5.0  # Max seconds vector store writes wait to be persisted
+    persist_max_pending: int = 20  # Writes that trigger an immediate persist
+
+    # Extracted PDF text, cached by content so re-ingests skip parsing
+    text_cache_dir: str = os.getenv("TEXT_CACHE_DIR", "./text_cache")
+    text_cache_max_bytes: int = 256 << 20  # 0 disables the text cache
 
     # Application Configuration
     app_name: str = "Decentralized RAG System"
     debug: bool = os.getenv("DEBUG", "false").lower() == "true"
+    log_level: str = os.getenv("LOG_LEVEL", "INFO")
+    # Server processes for `python -m app.main`. Each worker opens its own
+    # Chroma client and in-process caches, so only raise this when the
+    # vector store is not written from several processes at once.
+    web_concurrency: int = int(os.getenv("WEB_CONCURRENCY", "1"))
     cors_origins: list = ["http://localhost:3000", "http://localhost:3002", "http://localhost:5173"]
 
     # RAG Configuration
     chunk_size: int = 1000
     chunk_overlap: int = 200
+    pdf_workers: int = 0  # Processes for PDF text extraction, 0 = one per CPU
     similarity_top_k: int = 5
     llm_temperature: float = 0.1
+    query_cache_size: int = 1024  # Questions whose embeddings/answers are cached, 0 disables
+    query_cache_ttl: float = 3600.0  # Seconds
+    query_cache_similarity: float = 0.97  # Cosine similarity needed to reuse an answer
 
     class Config:
         env_file = ".env"
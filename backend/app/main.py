@@ -1,8 +1,23 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
-from typing import Optional, List
+from fastapi.responses import FileResponse, ORJSONResponse, Response, StreamingResponse
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, BinaryIO, Optional, List, Tuple
+import asyncio
+import hashlib
 import logging
+import os
+import uuid
+import orjson
+from pydantic import TypeAdapter, ValidationError
+
+try:
+    from sse_starlette.sse import EventSourceResponse
+except ImportError:  # sse-starlette is optional; /query/stream falls back to /query
+    EventSourceResponse = None
 
 from .config import get_settings
 from .models.schemas import (
@@ -17,16 +32,54 @@ from .models.schemas import (
 from .services.walrus_service import WalrusService
 from .services.sui_service import SuiService
 from .services.rag_service import RAGService
+from .services.cache_service import CacheService
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+settings = get_settings()
+logging.basicConfig(level=settings.log_level.upper())
 logger = logging.getLogger(__name__)
 
+# Settings are immutable after startup; bind the ones read on every
+# request to plain globals instead of going through the Pydantic model
+SUI_PACKAGE_ID = settings.sui_package_id
+SUI_MODULE = settings.sui_module_name
+HAS_OPENAI = bool(settings.openai_api_key)
+BACKEND_SIGNS_TX = settings.backend_signs_tx
+
+# Validates a whole list of documents in a single call into pydantic-core
+_DOC_LIST_ADAPTER = TypeAdapter(List[DocumentMetadata])
+_QUERY_ADAPTER = TypeAdapter(QueryRequest)
+
+UPLOAD_SEM = asyncio.Semaphore(settings.max_concurrent_uploads)
+
+# Responses of completed uploads keyed by (content digest, wallet, public,
+# filename), so re-uploading the same file skips Walrus and embeddings
+_upload_dedup: "OrderedDict[Tuple[str, str, bool, str], DocumentUploadResponse]" = OrderedDict()
+
+# Initialize services
+walrus_service = WalrusService()
+sui_service = SuiService()
+rag_service = RAGService()
+cache_service = CacheService()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Close pooled connections and release workers on shutdown"""
+    try:
+        yield
+    finally:
+        await walrus_service.aclose()
+        await rag_service.flush()
+        rag_service.shutdown()
+
+
 # Initialize FastAPI app
-settings = get_settings()
 app = FastAPI(
     title=settings.app_name,
-    debug=settings.debug
+    debug=settings.debug,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -38,37 +91,108 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-walrus_service = WalrusService()
-sui_service = SuiService()
-rag_service = RAGService()
+# Health responses never change after startup, so validate and encode
+# them once instead of on every liveness probe
+_ROOT_RESPONSE = orjson.dumps(HealthCheckResponse(
+    status="healthy",
+    services={
+        "walrus": "configured",
+        "sui": "configured" if SUI_PACKAGE_ID else "not_configured",
+        "rag": "ready",
+        "openai": "configured" if HAS_OPENAI else "not_configured"
+    }
+).model_dump())
+
+_HEALTH_RESPONSE = orjson.dumps(HealthCheckResponse(
+    status="healthy",
+    services={
+        "walrus": "online",
+        "sui": "online",
+        "rag": "online"
+    }
+).model_dump())
 
 
 @app.get("/", response_model=HealthCheckResponse)
 async def root():
     """Root endpoint with health check"""
-    return {
-        "status": "healthy",
-        "services": {
-            "walrus": "configured",
-            "sui": "configured" if settings.sui_package_id else "not_configured",
-            "rag": "ready",
-            "openai": "configured" if settings.openai_api_key else "not_configured"
-        }
-    }
+    return Response(content=_ROOT_RESPONSE, media_type="application/json")
 
 
 @app.get("/health", response_model=HealthCheckResponse)
 async def health_check():
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "services": {
-            "walrus": "online",
-            "sui": "online",
-            "rag": "online"
-        }
-    }
+    return Response(content=_HEALTH_RESPONSE, media_type="application/json")
+
+
+def spooled_fileno(fileobj: BinaryIO) -> int:
+    """File descriptor of a spooled upload, moving an in-memory spool to disk first"""
+    fd = fileobj.fileno()  # SpooledTemporaryFile rolls over on fileno()
+    fileobj.flush()
+    return fd
+
+
+async def iter_fd_chunks(fd: int, chunk_size: int) -> AsyncIterator[bytes]:
+    """
+    Yield a file's content in fixed-size chunks by absolute offset
+
+    os.pread leaves the file position alone, so another reader of the same
+    file, such as text extraction, can run at the same time.
+    """
+    offset = 0
+    while chunk := await run_in_threadpool(os.pread, fd, chunk_size, offset):
+        offset += len(chunk)
+        yield chunk
+
+
+async def index_upload(
+    content: BinaryIO,
+    filename: str,
+    digest: str,
+    key: str,
+    metadata: dict
+) -> dict:
+    """Extract an upload's text and index it for RAG under a (provisional) key"""
+    text = await rag_service.extract_text(content, filename, cache_key=digest)
+    return await rag_service.index_text(
+        blob_id=key,
+        text=text,
+        filename=filename,
+        metadata=metadata
+    )
+
+
+async def gather_settled(task: asyncio.Task):
+    """Await a task, returning its exception instead of raising it"""
+    result, = await asyncio.gather(task, return_exceptions=True)
+    return result
+
+
+def digest_file(fileobj: BinaryIO) -> str:
+    """BLAKE2b hex digest of a file object's full content, rewinding it afterwards"""
+    fileobj.seek(0)
+    if hasattr(hashlib, "file_digest"):
+        digest = hashlib.file_digest(fileobj, "blake2b")
+    else:  # Python < 3.11
+        digest = hashlib.blake2b()
+        while chunk := fileobj.read(settings.upload_chunk_size):
+            digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def remember_upload(key: Tuple[str, str, bool, str], response: DocumentUploadResponse):
+    """Record a completed upload, evicting the oldest entries past the limit"""
+    _upload_dedup[key] = response
+    _upload_dedup.move_to_end(key)
+    while len(_upload_dedup) > settings.upload_dedup_size:
+        _upload_dedup.popitem(last=False)
+
+
+def forget_upload(blob_id: str):
+    """Drop recorded uploads of a blob whose embeddings were removed"""
+    for key in [k for k, r in _upload_dedup.items() if r.walrus_blob_id == blob_id]:
+        del _upload_dedup[key]
 
 
 @app.post("/upload-document", response_model=DocumentUploadResponse)
@@ -86,93 +210,207 @@ async def upload_document(
         is_public: Whether the document should be public
     """
     try:
-        logger.info(f"Uploading document: {file.filename} for wallet: {wallet_address}")
-
-        # Read file content
-        file_content = await file.read()
-
-        # Step 1: Upload to Walrus
-        logger.info("Uploading to Walrus...")
-        try:
-            walrus_result = await walrus_service.upload_blob(file_content)
-            blob_id = walrus_result["blob_id"]
-            logger.info(f"Uploaded to Walrus: {blob_id}")
-        except Exception as e:
-            error_msg = str(e) if str(e) else f"{type(e).__name__}: {repr(e)}"
-            logger.error(f"Walrus upload failed: {error_msg}", exc_info=True)
-            raise Exception(f"Failed to upload to Walrus: {error_msg}")
-
-        # Step 2: Prepare Sui transaction data for frontend to sign (if package is configured)
-        sui_transaction_data = None
-        if settings.sui_package_id:
-            logger.info("Preparing Sui transaction data for frontend...")
-            sui_transaction_data = {
-                "package_id": settings.sui_package_id,
-                "module_name": settings.sui_module_name,
-                "function_name": "mint_document",
-                "arguments": {
-                    "name": file.filename,
-                    "walrus_blob_id": blob_id,
-                    "is_public": is_public
-                },
-                "gas_budget": 10000000
-            }
-        else:
-            logger.warning("Sui package not configured, skipping NFT minting")
-
-        # Step 3: Process document for RAG
-        logger.info("Processing document for RAG...")
-        try:
-            rag_result = await rag_service.process_document(
-                blob_id=blob_id,
-                content=file_content,
-                filename=file.filename,
+        logger.info("Uploading document: %s for wallet: %s", file.filename, wallet_address)
+
+        # Short-circuit re-uploads of a file this wallet already uploaded
+        digest = await run_in_threadpool(digest_file, file.file)
+        dedup_key = (digest, wallet_address, is_public, file.filename)
+        if dedup_key in _upload_dedup:
+            _upload_dedup.move_to_end(dedup_key)
+            logger.info("Duplicate upload of %s, reusing blob", digest)
+            return _upload_dedup[dedup_key]
+
+        # Cap concurrent uploads so a burst cannot exhaust memory or the
+        # embedding API and starve other requests
+        async with UPLOAD_SEM:
+            # Step 1: Stream the spooled upload to Walrus while extracting and
+            # embedding its text. The upload reads by offset and extraction
+            # through the file object, so neither holds a second copy for the
+            # other. The blob ID is not known until Walrus answers, so the
+            # chunks are indexed under a provisional key and re-keyed after.
+            fd = await run_in_threadpool(spooled_fileno, file.file)
+            await file.seek(0)
+            provisional_key = f"pending-{uuid.uuid4().hex}"
+
+            logger.info("Uploading to Walrus and processing document for RAG...")
+            upload_task = asyncio.create_task(walrus_service.upload_blob(
+                iter_fd_chunks(fd, settings.upload_chunk_size)
+            ))
+            rag_task = asyncio.create_task(index_upload(
+                file.file,
+                file.filename,
+                digest,
+                provisional_key,
                 metadata={
                     "owner": wallet_address,
                     "is_public": is_public
                 }
+            ))
+
+            try:
+                walrus_result = await upload_task
+            except Exception as e:
+                # Stop indexing a document that was not stored, then remove
+                # any chunks it already wrote
+                rag_task.cancel()
+                await gather_settled(rag_task)
+                try:
+                    await rag_service.delete_document_embeddings(provisional_key)
+                except Exception:
+                    # Without OpenAI there is no vector store to clean up; the
+                    # client should still see the Walrus error
+                    logger.exception("Failed to remove embeddings under %s", provisional_key)
+                error_msg = str(e) if str(e) else f"{type(e).__name__}: {repr(e)}"
+                logger.error("Walrus upload failed: %s", error_msg, exc_info=True)
+                raise Exception(f"Failed to upload to Walrus: {error_msg}")
+
+            blob_id = walrus_result["blob_id"]
+            logger.info("Uploaded to Walrus: %s", blob_id)
+
+            # Step 2: Mint the NFT on Sui, either with the backend's own key (in a
+            # thread, while embedding continues) or by handing the transaction
+            # data to the frontend to sign
+            sui_transaction_data = None
+            mint_task = None
+            if not SUI_PACKAGE_ID:
+                logger.warning("Sui package not configured, skipping NFT minting")
+            elif BACKEND_SIGNS_TX:
+                logger.info("Minting document NFT on Sui...")
+                mint_task = asyncio.create_task(run_in_threadpool(
+                    sui_service.mint_document,
+                    name=file.filename,
+                    walrus_blob_id=blob_id,
+                    is_public=is_public
+                ))
+            else:
+                logger.info("Preparing Sui transaction data for frontend...")
+                sui_transaction_data = SuiTransactionData(
+                    package_id=SUI_PACKAGE_ID,
+                    module_name=SUI_MODULE,
+                    arguments={
+                        "name": file.filename,
+                        "walrus_blob_id": blob_id,
+                        "is_public": is_public
+                    }
+                ).model_dump()
+
+            # Step 3: Finish RAG processing and move the chunks to the blob ID
+            rag_result = await gather_settled(rag_task)
+            rag_indexed = False
+            if isinstance(rag_result, BaseException):
+                e = rag_result
+                error_msg = str(e) if str(e) else f"{type(e).__name__}: {repr(e)}"
+                logger.error("RAG processing failed: %s", error_msg, exc_info=e)
+                # Continue even if RAG fails - document is still uploaded to Walrus
+                logger.warning("Continuing without RAG processing due to error")
+            else:
+                try:
+                    await rag_service.reassign_blob_id(provisional_key, blob_id)
+                    rag_indexed = True
+                    logger.info("RAG processing complete: %s chunks created", rag_result['chunks_created'])
+                except Exception as e:
+                    logger.error("RAG re-keying failed: %s", e, exc_info=True)
+                    # Do not leave chunks behind under the provisional key
+                    try:
+                        await rag_service.delete_document_embeddings(provisional_key)
+                    except Exception:
+                        logger.exception("Failed to remove embeddings under %s", provisional_key)
+
+            mint_result = None
+            mint_error = None
+            if mint_task is not None:
+                # The blob is stored and indexed by now, so a failed mint is
+                # reported in the response rather than failing the upload
+                try:
+                    mint_result = await mint_task
+                    logger.info("Minted document: %s", mint_result["document_object_id"])
+                except Exception as e:
+                    mint_error = str(e) if str(e) else f"{type(e).__name__}: {repr(e)}"
+                    logger.error("Minting failed: %s", mint_error, exc_info=True)
+
+        if mint_result:
+            response = DocumentUploadResponse(
+                walrus_blob_id=blob_id,
+                sui_transaction_digest=mint_result["transaction_digest"],
+                document_id=mint_result["document_object_id"],
+                message="Document uploaded to Walrus and minted on Sui."
+            )
+        elif mint_error:
+            response = DocumentUploadResponse(
+                walrus_blob_id=blob_id,
+                sui_transaction_digest=None,
+                document_id=None,
+                message=f"Document uploaded to Walrus, but minting on Sui failed: {mint_error}"
+            )
+        else:
+            response = DocumentUploadResponse(
+                walrus_blob_id=blob_id,
+                sui_transaction_digest=None,  # Will be set after user signs transaction
+                document_id=None,  # Will be set after transaction completes
+                message="Document uploaded to Walrus. Please sign the transaction to mint NFT on Sui.",
+                sui_transaction_data=sui_transaction_data
             )
-            logger.info(f"RAG processing complete: {rag_result['chunks_created']} chunks created")
-        except Exception as e:
-            error_msg = str(e) if str(e) else f"{type(e).__name__}: {repr(e)}"
-            logger.error(f"RAG processing failed: {error_msg}", exc_info=True)
-            # Continue even if RAG fails - document is still uploaded to Walrus
-            logger.warning("Continuing without RAG processing due to error")
-
-        return DocumentUploadResponse(
-            walrus_blob_id=blob_id,
-            sui_transaction_digest=None,  # Will be set after user signs transaction
-            document_id=None,  # Will be set after transaction completes
-            message="Document uploaded to Walrus. Please sign the transaction to mint NFT on Sui.",
-            sui_transaction_data=sui_transaction_data
-        )
+
+        # Only remember fully processed uploads so failed RAG runs are retried
+        if rag_indexed:
+            remember_upload(dedup_key, response)
+
+        return response
 
     except Exception as e:
         error_msg = str(e) if str(e) else f"{type(e).__name__}: {repr(e)}"
-        logger.error(f"Upload failed: {error_msg}", exc_info=True)
+        logger.error("Upload failed: %s", error_msg, exc_info=True)
         raise HTTPException(status_code=500, detail=error_msg)
 
 
-@app.post("/query", response_model=QueryResponse)
-async def query_documents(request: QueryRequest):
+def etag_response(request: Request, payload) -> Response:
     """
-    Query documents using RAG
+    Encode a JSON payload with an ETag, answering 304 if the client has it
 
     Args:
-        request: Query request with question and optional filters
+        request: Incoming request, checked for If-None-Match
+        payload: JSON-serialisable response body
     """
+    body = orjson.dumps(payload)
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=30"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def resolve_document_ids(request: QueryRequest) -> Optional[List[str]]:
+    """Use the explicit document IDs, or the wallet's documents if only a wallet is given"""
+    document_ids = request.document_ids
+    if request.wallet_address and not document_ids:
+        try:
+            user_docs = sui_service.get_user_documents(request.wallet_address)
+            document_ids = [doc["walrus_blob_id"] for doc in user_docs]
+            logger.info("Found %s documents for user", len(document_ids))
+        except Exception as e:
+            logger.warning("Failed to get user documents: %s", e)
+    return document_ids
+
+
+async def parse_query_request(request: Request) -> QueryRequest:
+    """Parse and validate a QueryRequest body in a single pydantic-core pass"""
     try:
-        logger.info(f"Querying: {request.question}")
+        return _QUERY_ADAPTER.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        )
 
-        # If wallet address is provided, get user's documents
-        document_ids = request.document_ids
-        if request.wallet_address and not document_ids:
-            try:
-                user_docs = sui_service.get_user_documents(request.wallet_address)
-                document_ids = [doc["walrus_blob_id"] for doc in user_docs]
-                logger.info(f"Found {len(document_ids)} documents for user")
-            except Exception as e:
-                logger.warning(f"Failed to get user documents: {str(e)}")
+
+async def answer_query(request: QueryRequest) -> QueryResponse:
+    """Resolve the documents to search and answer the question with RAG"""
+    try:
+        logger.info("Querying: %s", request.question)
+
+        document_ids = resolve_document_ids(request)
 
         # Query RAG system
         result = await rag_service.query_documents(
@@ -183,12 +421,71 @@ async def query_documents(request: QueryRequest):
         return QueryResponse(**result)
 
     except Exception as e:
-        logger.error(f"Query failed: {str(e)}")
+        logger.error("Query failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post(
+    "/query",
+    response_model=QueryResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": QueryRequest.model_json_schema()}}
+        }
+    }
+)
+async def query_documents(request: Request):
+    """
+    Query documents using RAG
+
+    The body is read raw and validated against QueryRequest directly,
+    skipping FastAPI's generic JSON decode and body-field handling.
+
+    Args:
+        request: HTTP request whose JSON body is a QueryRequest
+    """
+    return await answer_query(await parse_query_request(request))
+
+
+@app.post("/query/stream")
+async def stream_query_documents(request: QueryRequest):
+    """
+    Query documents using RAG, streaming the answer as Server-Sent Events
+
+    Emits a "sources" event, one "token" event per answer fragment and a
+    final "done" event. Falls back to the regular /query response when
+    sse-starlette is not installed.
+
+    Args:
+        request: Query request with question and optional filters
+    """
+    if EventSourceResponse is None:
+        return await answer_query(request)
+
+    logger.info("Streaming query: %s", request.question)
+
+    document_ids = resolve_document_ids(request)
+
+    async def sse_stream():
+        try:
+            async for event in rag_service.stream_query(
+                question=request.question,
+                document_ids=document_ids
+            ):
+                data = event["data"]
+                if not isinstance(data, str):
+                    data = orjson.dumps(data).decode()
+                yield {"event": event["event"], "data": data}
+        except Exception as e:
+            logger.error("Streaming query failed: %s", e)
+            yield {"event": "error", "data": str(e)}
+
+    return EventSourceResponse(sse_stream(), headers={"X-Accel-Buffering": "no"})
+
+
 @app.get("/documents/{wallet_address}", response_model=UserDocumentsResponse)
-async def get_user_documents(wallet_address: str):
+async def get_user_documents(wallet_address: str, request: Request):
     """
     Get all documents owned by a wallet address
 
@@ -196,26 +493,82 @@ async def get_user_documents(wallet_address: str):
         wallet_address: Sui wallet address
     """
     try:
-        logger.info(f"Getting documents for wallet: {wallet_address}")
+        logger.info("Getting documents for wallet: %s", wallet_address)
 
-        if not settings.sui_package_id:
-            return UserDocumentsResponse(
+        if not SUI_PACKAGE_ID:
+            response = UserDocumentsResponse(
                 documents=[],
                 total=0
             )
+            return etag_response(request, response.model_dump())
 
         documents = sui_service.get_user_documents(wallet_address)
 
-        return UserDocumentsResponse(
-            documents=[DocumentMetadata(**doc) for doc in documents],
+        response = UserDocumentsResponse(
+            documents=_DOC_LIST_ADAPTER.validate_python(documents),
             total=len(documents)
         )
+        return etag_response(request, response.model_dump())
 
     except Exception as e:
-        logger.error(f"Failed to get documents: {str(e)}")
+        logger.error("Failed to get documents: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def stream_json_array(items: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    """
+    Encode items as a JSON array incrementally, one element at a time
+
+    The opening bracket is sent with the first element, so nothing is
+    produced until the first item has been fetched.
+    """
+    prefix = b"["
+    async for item in items:
+        yield prefix + orjson.dumps(item)
+        prefix = b","
+    yield b"]" if prefix == b"," else b"[]"
+
+
+async def aiter_documents(wallet_address: str) -> AsyncIterator[dict]:
+    """Yield a wallet's validated documents as Sui returns them"""
+    if not SUI_PACKAGE_ID:
+        return
+    documents = sui_service.iter_user_documents(wallet_address)
+    try:
+        async for doc in iterate_in_threadpool(documents):
+            yield DocumentMetadata(**doc).model_dump()
+    except Exception as e:
+        logger.error("Failed to stream documents: %s", e)
+        raise
+
+
+@app.get("/documents/{wallet_address}/stream")
+async def stream_user_documents(wallet_address: str):
+    """
+    Stream all documents owned by a wallet address as a JSON array
+
+    Unlike /documents/{wallet_address}, documents are sent as soon as each
+    one is fetched from Sui, so the body is a bare array without a total.
+
+    Args:
+        wallet_address: Sui wallet address
+    """
+    logger.info("Streaming documents for wallet: %s", wallet_address)
+
+    # Pull the first element before responding so Sui errors still surface
+    # as a 500 instead of a truncated 200 body
+    try:
+        stream = stream_json_array(aiter_documents(wallet_address))
+        first_chunk = await first_chunk_of(stream)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return StreamingResponse(
+        prepend_chunk(first_chunk, stream),
+        media_type="application/json"
+    )
+
+
 @app.get("/documents/{wallet_address}/{document_id}")
 async def get_document(wallet_address: str, document_id: str):
     """
@@ -226,7 +579,7 @@ async def get_document(wallet_address: str, document_id: str):
         document_id: Document object ID
     """
     try:
-        if not settings.sui_package_id:
+        if not SUI_PACKAGE_ID:
             raise HTTPException(status_code=404, detail="Sui not configured")
 
         document = sui_service.get_document(document_id)
@@ -244,10 +597,26 @@ async def get_document(wallet_address: str, document_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to get document: {str(e)}")
+        logger.error("Failed to get document: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def first_chunk_of(stream: AsyncIterator[bytes]) -> bytes:
+    """Read the first chunk of a byte stream, or b"" if it is empty"""
+    try:
+        return await stream.__anext__()
+    except StopAsyncIteration:
+        return b""
+
+
+async def prepend_chunk(first_chunk: bytes, rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Re-attach an already consumed first chunk to the rest of a byte stream"""
+    if first_chunk:
+        yield first_chunk
+    async for chunk in rest:
+        yield chunk
+
+
 @app.get("/download/{blob_id}")
 async def download_document(blob_id: str, wallet_address: Optional[str] = None):
     """
@@ -258,23 +627,46 @@ async def download_document(blob_id: str, wallet_address: Optional[str] = None):
         wallet_address: Optional wallet address for access control
     """
     try:
-        logger.info(f"Downloading blob: {blob_id}")
+        logger.info("Downloading blob: %s", blob_id)
 
         # TODO: Add access control based on document ownership
         # For now, allow all downloads
 
-        content = await walrus_service.download_blob(blob_id)
+        # Serve cached blobs straight from disk; FileResponse uses sendfile
+        cached_path = cache_service.get(blob_id)
+        if cached_path:
+            return FileResponse(
+                cached_path,
+                media_type="application/octet-stream",
+                filename=blob_id
+            )
+
+        # Pull the first chunk before responding so Walrus errors still
+        # surface as a 500 instead of a truncated 200 body. The HEAD for the
+        # blob size runs alongside it, so it costs no extra round trip.
+        stream = walrus_service.stream_blob(blob_id)
+        head, first_chunk = await asyncio.gather(
+            walrus_service.head_blob(blob_id),
+            first_chunk_of(stream)
+        )
+
+        headers = {
+            "Content-Disposition": f"attachment; filename={blob_id}"
+        }
+        # A known length lets clients show progress and avoids chunked framing.
+        # Only a successful HEAD describes the blob; an error's length is its
+        # own body's, so otherwise the response stays chunk-encoded.
+        if head["exists"] and head["size"] is not None:
+            headers["Content-Length"] = str(head["size"])
 
         return StreamingResponse(
-            iter([content]),
+            cache_service.tee(blob_id, prepend_chunk(first_chunk, stream)),
             media_type="application/octet-stream",
-            headers={
-                "Content-Disposition": f"attachment; filename={blob_id}"
-            }
+            headers=headers
         )
 
     except Exception as e:
-        logger.error(f"Download failed: {str(e)}")
+        logger.error("Download failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -288,11 +680,12 @@ async def delete_document(blob_id: str, wallet_address: str):
         wallet_address: Wallet address for verification
     """
     try:
-        logger.info(f"Deleting document: {blob_id}")
+        logger.info("Deleting document: %s", blob_id)
 
         # TODO: Verify ownership before deletion
 
-        result = rag_service.delete_document_embeddings(blob_id)
+        result = await rag_service.delete_document_embeddings(blob_id)
+        forget_upload(blob_id)
 
         return {
             "message": "Document embeddings deleted",
@@ -301,7 +694,7 @@ async def delete_document(blob_id: str, wallet_address: str):
         }
 
     except Exception as e:
-        logger.error(f"Delete failed: {str(e)}")
+        logger.error("Delete failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -319,8 +712,12 @@ async def complete_upload(
         transaction_digest: Sui transaction digest
         wallet_address: Wallet address that signed the transaction
     """
+    # Only meaningful when the frontend signs the mint transaction
+    if BACKEND_SIGNS_TX:
+        raise HTTPException(status_code=404, detail="Uploads are minted by the backend")
+
     try:
-        logger.info(f"Completing upload for blob {blob_id} with transaction {transaction_digest}")
+        logger.info("Completing upload for blob %s with transaction %s", blob_id, transaction_digest)
         
         # Optionally verify the transaction and extract document ID
         # For now, we'll just log it
@@ -332,12 +729,12 @@ async def complete_upload(
         }
     
     except Exception as e:
-        logger.error(f"Failed to complete upload: {str(e)}")
+        logger.error("Failed to complete upload: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/stats/{blob_id}")
-async def get_document_stats(blob_id: str):
+async def get_document_stats(blob_id: str, request: Request):
     """
     Get statistics about a document
 
@@ -345,14 +742,22 @@ async def get_document_stats(blob_id: str):
         blob_id: Walrus blob ID
     """
     try:
-        stats = rag_service.get_document_stats(blob_id)
-        return stats
+        stats = await rag_service.get_document_stats(blob_id)
+        return etag_response(request, stats)
 
     except Exception as e:
-        logger.error(f"Failed to get stats: {str(e)}")
+        logger.error("Failed to get stats: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Workers need the app as an import string; run with `python -m app.main`
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=settings.web_concurrency
+    )
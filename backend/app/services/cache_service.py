@@ -0,0 +1,166 @@
+import hashlib
+import os
+from collections import OrderedDict
+from typing import AsyncIterator, Optional
+import aiofiles
+from ..config import get_settings
+
+
+class CacheService:
+    """
+    Bounded on-disk LRU cache, of Walrus blobs unless told otherwise
+
+    Args:
+        cache_dir: Directory holding the cached files (default: blob_cache_dir)
+        max_bytes: Size budget, 0 disabling the cache (default: blob_cache_max_bytes)
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.settings = get_settings()
+        self.cache_dir = cache_dir if cache_dir is not None else self.settings.blob_cache_dir
+        self.max_bytes = max_bytes if max_bytes is not None else self.settings.blob_cache_max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # file name -> size
+        self._total_bytes = 0
+        self._loaded = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _load(self):
+        """Rebuild the LRU order from files left by a previous run (lazy initialization)"""
+        if self._loaded:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.endswith(".part"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total_bytes += size
+        self._loaded = True
+        self._evict()
+
+    @staticmethod
+    def _file_name(blob_id: str) -> str:
+        """Map a blob ID to a file name that is safe to use on disk"""
+        return hashlib.blake2b(blob_id.encode(), digest_size=16).hexdigest()
+
+    def _add(self, name: str, size: int):
+        """Account for a file just moved into the cache"""
+        if name in self._entries:
+            self._total_bytes -= self._entries.pop(name)
+        self._entries[name] = size
+        self._total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used blobs until the cache fits its budget"""
+        while self._total_bytes > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+
+    def get(self, blob_id: str) -> Optional[str]:
+        """
+        Look up a cached blob
+
+        Args:
+            blob_id: Walrus blob ID
+
+        Returns:
+            Path of the cached file, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        self._load()
+
+        name = self._file_name(blob_id)
+        if name not in self._entries:
+            return None
+
+        path = os.path.join(self.cache_dir, name)
+        if not os.path.exists(path):
+            self._total_bytes -= self._entries.pop(name)
+            return None
+
+        self._entries.move_to_end(name)
+        return path
+
+    async def tee(self, blob_id: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """
+        Pass a blob's chunks through while writing them to the cache
+
+        The blob is only added to the cache once the whole stream has been
+        written; a failed or abandoned download leaves nothing behind.
+
+        Args:
+            blob_id: Walrus blob ID
+            chunks: Blob content as a stream of bytes
+
+        Yields:
+            The same chunks, unchanged
+        """
+        if not self.enabled:
+            async for chunk in chunks:
+                yield chunk
+            return
+        self._load()
+
+        name = self._file_name(blob_id)
+        path = os.path.join(self.cache_dir, name)
+        part_path = f"{path}.{os.getpid()}.{id(chunks)}.part"
+        size = 0
+        complete = False
+
+        try:
+            async with aiofiles.open(part_path, "wb") as f:
+                async for chunk in chunks:
+                    yield chunk
+                    if size <= self.max_bytes:
+                        size += len(chunk)
+                        await f.write(chunk)
+            complete = size <= self.max_bytes
+        finally:
+            if complete:
+                os.replace(part_path, path)
+                self._add(name, size)
+            else:
+                try:
+                    os.remove(part_path)
+                except FileNotFoundError:
+                    pass
+
+    async def put(self, blob_id: str, data: bytes):
+        """
+        Cache a value held in memory
+
+        Content larger than the whole budget is not cached.
+
+        Args:
+            blob_id: Key of the value, such as a Walrus blob ID
+            data: Content to cache
+        """
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+        self._load()
+
+        name = self._file_name(blob_id)
+        path = os.path.join(self.cache_dir, name)
+        part_path = f"{path}.{os.getpid()}.{id(data)}.part"
+        try:
+            async with aiofiles.open(part_path, "wb") as f:
+                await f.write(data)
+        except BaseException:
+            try:
+                os.remove(part_path)
+            except FileNotFoundError:
+                pass
+            raise
+        os.replace(part_path, path)
+        self._add(name, len(data))
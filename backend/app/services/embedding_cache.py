@@ -0,0 +1,139 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+import numpy as np
+from ..config import get_settings
+
+
+class _Entry:
+    """Cached embedding of one normalized question and the answers given to it"""
+
+    __slots__ = ("vector", "slot", "created_at", "answers")
+
+    def __init__(self, vector: List[float], slot: int):
+        self.vector = vector
+        self.slot = slot
+        self.created_at = time.monotonic()
+        self.answers: Dict[Hashable, Dict] = {}
+
+
+class EmbeddingCache:
+    """
+    LRU + TTL cache of question embeddings and RAG answers
+
+    Exact repeats of a question (after lowercasing and collapsing
+    whitespace) reuse its embedding and answer. Questions whose embedding
+    is at least `similarity_threshold` cosine-similar to a cached one reuse
+    that question's answer. Answers are scoped, so a question asked against
+    different documents is answered separately.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # Normalized vectors of cached questions, one row per slot
+        self._matrix: Optional[np.ndarray] = None
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+
+    @staticmethod
+    def key(question: str) -> str:
+        """Cache key of a question, insensitive to case and whitespace"""
+        normalized = " ".join(question.lower().split())
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    def _get(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.created_at > self.ttl_seconds:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._free_slots.append(entry.slot)
+
+    def get_vector(self, key: str) -> Optional[List[float]]:
+        """Cached embedding of a question, if any"""
+        entry = self._get(key)
+        return entry.vector if entry else None
+
+    def put_vector(self, key: str, vector: List[float]):
+        """Cache the embedding of a question"""
+        if self.max_entries <= 0:
+            return
+        if key in self._entries:
+            self._remove(key)
+        while not self._free_slots:
+            self._remove(next(iter(self._entries)))
+
+        row = np.asarray(vector, dtype=np.float32)
+        if self._matrix is None:
+            self._matrix = np.zeros((self.max_entries, row.shape[0]), dtype=np.float32)
+        norm = np.linalg.norm(row)
+        slot = self._free_slots.pop()
+        self._matrix[slot] = row / norm if norm else row
+        self._entries[key] = _Entry(vector, slot)
+
+    def get_answer(self, key: str, scope: Hashable) -> Optional[Dict]:
+        """Answer previously given to exactly this question within a scope"""
+        entry = self._get(key)
+        return entry.answers.get(scope) if entry else None
+
+    def find_similar_answer(self, vector: List[float], scope: Hashable) -> Optional[Dict]:
+        """Answer given within a scope to the most similar cached question"""
+        # Only score live entries, so an expired best match cannot hide a
+        # live one that also clears the threshold
+        now = time.monotonic()
+        expired = [
+            key for key, entry in self._entries.items()
+            if now - entry.created_at > self.ttl_seconds
+        ]
+        for key in expired:
+            self._remove(key)
+        candidates = [
+            (key, entry) for key, entry in self._entries.items()
+            if scope in entry.answers
+        ]
+        if not candidates or self._matrix is None:
+            return None
+
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if not norm:
+            return None
+        slots = np.fromiter((entry.slot for _, entry in candidates), dtype=np.intp)
+        similarities = self._matrix[slots] @ (query / norm)
+
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+        key, _ = candidates[best]
+        entry = self._get(key)
+        return entry.answers.get(scope) if entry else None
+
+    def put_answer(self, key: str, scope: Hashable, answer: Dict):
+        """Cache the answer to a question whose embedding is cached"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.answers[scope] = answer
+
+    def clear_answers(self):
+        """Forget all answers, e.g. after the indexed documents changed"""
+        for entry in self._entries.values():
+            entry.answers.clear()
+
+
+_settings = get_settings()
+
+# Shared by every RAGService instance in the process
+embedding_cache = EmbeddingCache(
+    max_entries=_settings.query_cache_size,
+    ttl_seconds=_settings.query_cache_ttl,
+    similarity_threshold=_settings.query_cache_similarity
+)
@@ -1,5 +1,11 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
 import os
-from typing import List, Optional, Dict
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, BinaryIO, Iterator, List, Optional, Dict, Tuple, Union
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 from langchain_community.vectorstores import Chroma
@@ -8,7 +14,145 @@ from langchain.prompts import PromptTemplate
 from langchain.docstore.document import Document
 import PyPDF2
 from io import BytesIO
+from openai import (
+    AsyncOpenAI,
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 from ..config import get_settings
+from .cache_service import CacheService
+from .embedding_cache import embedding_cache
+from .vector_store import ChromaBackend, FAISSBackend, VectorStoreBackend
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # PyPDF2 is used when pypdfium2 is not installed
+    pdfium = None
+
+logger = logging.getLogger(__name__)
+
+NO_RESULTS_ANSWER = "I couldn't find any relevant information in the documents to answer your question."
+
+EXCERPT_LENGTH = 200  # Characters of a chunk shown with query sources
+
+# Embedding failures worth retrying: rate limits and transient server errors
+RETRYABLE_OPENAI_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+_exponential_backoff = wait_random_exponential(min=1, max=60)
+
+
+def _wait_retry_after(retry_state) -> float:
+    """Wait as long as the API's retry-after header asks, else back off exponentially"""
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    if response is not None:
+        try:
+            return float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    return _exponential_backoff(retry_state)
+
+
+def _iter_pages_pdfium(content: Union[bytes, BinaryIO]) -> Iterator[str]:
+    """Yield PDF text page by page with PDFium, which parses in native code"""
+    pdf = pdfium.PdfDocument(content)
+    try:
+        for i in range(len(pdf)):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            try:
+                yield textpage.get_text_range().replace("\r\n", "\n")
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
+
+def _iter_pages_pypdf2(content: Union[bytes, BinaryIO]) -> Iterator[str]:
+    """Yield PDF text page by page with the pure-Python PyPDF2 parser"""
+    pdf_file = BytesIO(content) if isinstance(content, bytes) else content
+    pdf_reader = PyPDF2.PdfReader(pdf_file)
+    for page in pdf_reader.pages:
+        yield page.extract_text()
+
+
+def extract_text_from_pdf(content: Union[bytes, BinaryIO]) -> str:
+    """
+    Extract text from PDF content
+
+    Uses PDFium when pypdfium2 is installed, falling back to PyPDF2 if it
+    is missing or cannot open the file. Defined at module level so it can
+    run in a worker process.
+
+    Args:
+        content: PDF file as bytes or a seekable binary file object
+
+    Returns:
+        Extracted text
+    """
+    try:
+        # Pages are released as soon as their text is taken, and joined once;
+        # repeated += would copy the text per page
+        if pdfium is not None:
+            try:
+                return "\n".join(_iter_pages_pdfium(content))
+            except pdfium.PdfiumError:
+                if not isinstance(content, bytes):
+                    content.seek(0)
+
+        return "\n".join(_iter_pages_pypdf2(content))
+
+    except Exception as e:
+        raise Exception(f"Failed to extract text from PDF: {str(e)}")
+
+
+def _extract_text_plain(content: Union[bytes, BinaryIO]) -> str:
+    """Decode content as UTF-8 text, dropping undecodable bytes"""
+    if not isinstance(content, bytes):
+        content = content.read()
+    return content.decode('utf-8', errors='ignore')
+
+
+# Text extractor per file extension; other files are decoded as plain text
+_TEXT_EXTRACTORS = {
+    "pdf": extract_text_from_pdf,
+    **dict.fromkeys(
+        ("txt", "md", "py", "js", "java", "cpp", "c", "h"),
+        _extract_text_plain
+    ),
+}
+
+
+def file_extension(filename: str) -> str:
+    """Lowercased extension of a filename (the whole name if it has none)"""
+    return filename.rpartition('.')[2].lower()
+
+
+def make_excerpt(text: str) -> str:
+    """Preview of a chunk as shown in query sources"""
+    return text[:EXCERPT_LENGTH] + "..." if len(text) > EXCERPT_LENGTH else text
+
+
+def extract_text_from_file(content: Union[bytes, BinaryIO], filename: str) -> str:
+    """
+    Extract text from file based on extension
+
+    Args:
+        content: File content as bytes or a seekable binary file object
+        filename: Original filename
+
+    Returns:
+        Extracted text
+    """
+    return _TEXT_EXTRACTORS.get(file_extension(filename), _extract_text_plain)(content)
 
 
 class RAGService:
@@ -19,6 +163,24 @@ class RAGService:
         self._embeddings = None
         self._vectorstore = None
         self._llm = None
+        self._async_openai = None
+        self._process_pool = None
+        # Extracted PDF text by content key, so re-ingests skip parsing
+        self.text_cache = CacheService(
+            cache_dir=self.settings.text_cache_dir,
+            max_bytes=self.settings.text_cache_max_bytes
+        )
+        # Vector store writes not yet persisted, flushed by _persist_loop.
+        # Only the FAISS backend does real work on persist; Chroma writes
+        # through on every call.
+        self._pending_writes = 0
+        self._persist_event = asyncio.Event()
+        self._persist_task = None
+        # Shared by all ingests so concurrent uploads respect the API rate limit
+        self._embedding_semaphore = asyncio.Semaphore(self.settings.embedding_concurrency)
+        self.query_cache = embedding_cache
+        # Question embeddings in flight, shared by concurrent asks of a question
+        self._pending_embeddings: Dict[str, asyncio.Future] = {}
 
         # Initialize text splitter (doesn't require API keys)
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -48,17 +210,55 @@ Answer: """
         if self._embeddings is None:
             if not self.settings.openai_api_key:
                 raise ValueError("OPENAI_API_KEY is required for RAG operations. Please set it in your environment variables.")
-            os.environ["OPENAI_API_KEY"] = self.settings.openai_api_key
-            self._embeddings = OpenAIEmbeddings()
+            self._embeddings = OpenAIEmbeddings(
+                model=self.settings.embedding_model,
+                openai_api_key=self.settings.openai_api_key
+            )
         return self._embeddings
 
-    def _get_vectorstore(self) -> Chroma:
+    def _get_async_openai(self) -> AsyncOpenAI:
+        """Lazy initialization of the async OpenAI client used for batch embedding"""
+        if self._async_openai is None:
+            if not self.settings.openai_api_key:
+                raise ValueError("OPENAI_API_KEY is required for RAG operations. Please set it in your environment variables.")
+            # Retries are handled by tenacity in _embed_batch
+            self._async_openai = AsyncOpenAI(
+                api_key=self.settings.openai_api_key,
+                max_retries=0
+            )
+        return self._async_openai
+
+    @retry(
+        retry=retry_if_exception_type(RETRYABLE_OPENAI_ERRORS),
+        wait=_wait_retry_after,
+        stop=stop_after_attempt(6),
+        reraise=True
+    )
+    async def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """Embed one batch of texts in a single request, retrying transient errors"""
+        client = self._get_async_openai()
+        async with self._embedding_semaphore:
+            response = await client.embeddings.create(
+                model=self.settings.embedding_model,
+                input=batch
+            )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def _get_vectorstore(self) -> VectorStoreBackend:
         """Lazy initialization of vectorstore"""
         if self._vectorstore is None:
-            self._vectorstore = Chroma(
-                persist_directory=self.settings.chroma_persist_directory,
-                embedding_function=self._get_embeddings()
-            )
+            if self.settings.vector_backend == "faiss":
+                self._vectorstore = FAISSBackend(
+                    self.settings.faiss_persist_directory,
+                    index_type=self.settings.faiss_index_type,
+                    quantization=self.settings.faiss_quantization,
+                    rerank_factor=self.settings.faiss_rerank_factor
+                )
+            else:
+                self._vectorstore = ChromaBackend(Chroma(
+                    persist_directory=self.settings.chroma_persist_directory,
+                    embedding_function=self._get_embeddings()
+                ))
         return self._vectorstore
 
     def _get_llm(self) -> ChatOpenAI:
@@ -66,64 +266,176 @@ Answer: """
         if self._llm is None:
             if not self.settings.openai_api_key:
                 raise ValueError("OPENAI_API_KEY is required for RAG operations. Please set it in your environment variables.")
-            os.environ["OPENAI_API_KEY"] = self.settings.openai_api_key
             self._llm = ChatOpenAI(
                 temperature=self.settings.llm_temperature,
-                model="gpt-3.5-turbo"
+                model="gpt-3.5-turbo",
+                openai_api_key=self.settings.openai_api_key
             )
         return self._llm
 
-    def extract_text_from_pdf(self, content: bytes) -> str:
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """Lazy initialization of the process pool used for PDF parsing"""
+        if self._process_pool is None:
+            # Forking the running server would copy locks held by its event
+            # loop and worker threads, so workers start from a clean process
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.settings.pdf_workers or os.cpu_count(),
+                mp_context=multiprocessing.get_context(start_method)
+            )
+        return self._process_pool
+
+    def _schedule_persist(self):
+        """Note a vector store write; the background task persists it shortly"""
+        self._pending_writes += 1
+        if self._persist_task is None or self._persist_task.done():
+            self._persist_task = asyncio.create_task(self._persist_loop())
+        self._persist_event.set()
+
+    async def _persist_loop(self):
+        """Persist at most every persist_interval seconds or persist_max_pending writes"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._persist_event.wait()
+
+            deadline = loop.time() + self.settings.persist_interval
+            while self._pending_writes < self.settings.persist_max_pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._persist_event.clear()
+                try:
+                    await asyncio.wait_for(self._persist_event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._persist_now()
+            except Exception:
+                # Writes stay pending; retry after the next interval
+                logger.exception("Failed to persist vector store")
+                await asyncio.sleep(self.settings.persist_interval)
+                self._persist_event.set()
+
+    async def _persist_now(self):
+        self._persist_event.clear()
+        pending = self._pending_writes
+        if pending:
+            await asyncio.to_thread(self._get_vectorstore().persist)
+            # Writes made while persisting stay counted for the next round
+            self._pending_writes -= pending
+
+    async def flush(self):
+        """Stop the background persister and persist any outstanding writes"""
+        if self._persist_task is not None:
+            self._persist_task.cancel()
+            try:
+                await self._persist_task
+            except asyncio.CancelledError:
+                pass
+            self._persist_task = None
+        await self._persist_now()
+
+    def shutdown(self):
+        """Release the PDF parsing worker processes"""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(cancel_futures=True)
+            self._process_pool = None
+
+    def extract_text_from_pdf(self, content: Union[bytes, BinaryIO]) -> str:
         """
         Extract text from PDF content
 
         Args:
-            content: PDF file as bytes
+            content: PDF file as bytes or a seekable binary file object
 
         Returns:
             Extracted text
         """
-        try:
-            pdf_file = BytesIO(content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
+        return extract_text_from_pdf(content)
 
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+    def extract_text_from_file(self, content: Union[bytes, BinaryIO], filename: str) -> str:
+        """
+        Extract text from file based on extension
 
-            return text
+        Args:
+            content: File content as bytes or a seekable binary file object
+            filename: Original filename
 
-        except Exception as e:
-            raise Exception(f"Failed to extract text from PDF: {str(e)}")
+        Returns:
+            Extracted text
+        """
+        return extract_text_from_file(content, filename)
+
+    @staticmethod
+    def _read_text_file(path: str) -> str:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    async def _read_text_cache(self, cache_key: str) -> Optional[str]:
+        """Cached text for a content key, or None on a miss"""
+        path = self.text_cache.get(cache_key)
+        if path is None:
+            return None
+        try:
+            return await asyncio.to_thread(self._read_text_file, path)
+        except FileNotFoundError:  # Evicted since the lookup
+            return None
 
-    def extract_text_from_file(self, content: bytes, filename: str) -> str:
+    async def extract_text(
+        self,
+        content: Union[bytes, BinaryIO],
+        filename: str,
+        cache_key: Optional[str] = None
+    ) -> str:
         """
-        Extract text from file based on extension
+        Extract text without blocking the event loop
+
+        PDF parsing is CPU-bound, so it runs in a process pool where it
+        neither holds the GIL nor serialises concurrent uploads. Extracted
+        PDF text is kept in a bounded on-disk LRU cache by content, so
+        re-ingesting the same document skips parsing entirely.
 
         Args:
-            content: File content as bytes
+            content: File content as bytes or a seekable binary file object
             filename: Original filename
+            cache_key: Key identifying the content, such as its digest or
+                Walrus blob ID; hashed from the content when omitted
 
         Returns:
             Extracted text
         """
-        extension = filename.lower().split('.')[-1]
-
-        if extension == 'pdf':
-            return self.extract_text_from_pdf(content)
-        elif extension in ['txt', 'md', 'py', 'js', 'java', 'cpp', 'c', 'h']:
-            return content.decode('utf-8', errors='ignore')
-        else:
-            # Try to decode as text
-            try:
-                return content.decode('utf-8', errors='ignore')
-            except:
-                raise Exception(f"Unsupported file type: {extension}")
+        is_pdf = file_extension(filename) == 'pdf'
+
+        if is_pdf and cache_key:
+            cached = await self._read_text_cache(cache_key)
+            if cached is not None:
+                return cached
+
+        if not isinstance(content, bytes):
+            # File objects cannot be sent to worker processes
+            content = await asyncio.to_thread(content.read)
+
+        if not is_pdf:
+            return extract_text_from_file(content, filename)
+
+        if not cache_key:
+            cache_key = hashlib.blake2b(content).hexdigest()
+            cached = await self._read_text_cache(cache_key)
+            if cached is not None:
+                return cached
+
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(
+            self._get_process_pool(), extract_text_from_pdf, content
+        )
+        await self.text_cache.put(cache_key, text.encode("utf-8"))
+        return text
 
     async def process_document(
         self,
         blob_id: str,
-        content: bytes,
+        content: Union[bytes, BinaryIO],
         filename: str,
         metadata: Optional[Dict] = None
     ) -> Dict:
@@ -132,7 +444,7 @@ Answer: """
 
         Args:
             blob_id: Walrus blob ID
-            content: File content
+            content: File content as bytes or a seekable binary file object
             filename: Original filename
             metadata: Additional metadata
 
@@ -141,33 +453,102 @@ Answer: """
         """
         try:
             # Extract text
-            text = self.extract_text_from_file(content, filename)
+            # Walrus blob IDs are content addresses, so they key the text cache
+            text = await self.extract_text(content, filename, cache_key=blob_id)
 
-            # Create chunks
-            chunks = self.text_splitter.split_text(text)
+        except Exception as e:
+            raise Exception(f"Failed to process document: {str(e)}")
 
-            # Prepare metadata for each chunk
-            metadatas = []
-            for i, chunk in enumerate(chunks):
-                chunk_metadata = {
+        return await self.index_text(blob_id, text, filename, metadata)
+
+    async def index_text(
+        self,
+        blob_id: str,
+        text: str,
+        filename: str,
+        metadata: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Chunk and embed already extracted text into the vector store
+
+        Each embedding batch is sent as soon as it is formed, so earlier
+        requests are in flight while later batches are still being queued.
+
+        Args:
+            blob_id: Walrus blob ID, or a provisional key to be replaced later
+                with reassign_blob_id
+            text: Extracted document text
+            filename: Original filename
+            metadata: Additional metadata
+
+        Returns:
+            Processing result
+        """
+        try:
+            # Create chunks, embedding each batch as soon as it is complete
+            batch_size = self.settings.embedding_batch_size
+            chunks = []
+            batches = []
+            try:
+                for chunk in self.text_splitter.split_text(text):
+                    chunks.append(chunk)
+                    if len(chunks) % batch_size == 0:
+                        batches.append(asyncio.create_task(self._embed_batch(chunks[-batch_size:])))
+                        await asyncio.sleep(0)
+                if len(chunks) % batch_size:
+                    batches.append(asyncio.create_task(
+                        self._embed_batch(chunks[len(chunks) - len(chunks) % batch_size:])
+                    ))
+                embeddings = [
+                    embedding
+                    for batch in await asyncio.gather(*batches)
+                    for embedding in batch
+                ]
+            except BaseException:
+                # Stop the other batches rather than leave them calling the API
+                for batch in batches:
+                    batch.cancel()
+                await asyncio.gather(*batches, return_exceptions=True)
+                raise
+
+            # Prepare metadata for each chunk. Excerpts are computed here so
+            # queries do not slice every retrieved chunk.
+            total_chunks = len(chunks)
+            extra = metadata or {}
+            metadatas = [
+                {
                     "walrus_blob_id": blob_id,
                     "filename": filename,
                     "chunk_index": i,
-                    "total_chunks": len(chunks)
+                    "total_chunks": total_chunks,
+                    "excerpt": make_excerpt(chunk),
+                    **extra
                 }
-                if metadata:
-                    chunk_metadata.update(metadata)
-                metadatas.append(chunk_metadata)
+                for i, chunk in enumerate(chunks)
+            ]
 
-            # Add to vector store
+            # Hand the vectors to the store directly so it does not embed
+            # the chunks again
             vectorstore = self._get_vectorstore()
-            vectorstore.add_texts(
-                texts=chunks,
-                metadatas=metadatas
-            )
-
-            # Persist the changes
-            vectorstore.persist()
+            if chunks:
+                # The write finishes even if the ingest is cancelled meanwhile,
+                # so cleanup after a cancellation sees every stored chunk
+                add = asyncio.ensure_future(asyncio.to_thread(
+                    vectorstore.add,
+                    ids=[str(uuid.uuid4()) for _ in chunks],
+                    embeddings=embeddings,
+                    documents=chunks,
+                    metadatas=metadatas
+                ))
+                try:
+                    await asyncio.shield(add)
+                except asyncio.CancelledError:
+                    await add
+                    raise
+
+            # Persist the changes (coalesced with other writes)
+            self._schedule_persist()
+            self.query_cache.clear_answers()
 
             return {
                 "success": True,
@@ -179,6 +560,86 @@ Answer: """
         except Exception as e:
             raise Exception(f"Failed to process document: {str(e)}")
 
+    async def _embed_question(self, question: str, cache_key: str) -> List[float]:
+        """
+        Embed a question once, reusing the vector for repeated questions
+
+        Concurrent asks of the same question, e.g. against different
+        document filters, wait for a single embedding request.
+        """
+        vector = self.query_cache.get_vector(cache_key)
+        if vector is not None:
+            return vector
+
+        pending = self._pending_embeddings.get(cache_key)
+        if pending is None:
+            pending = asyncio.ensure_future(
+                asyncio.to_thread(self._get_embeddings().embed_query, question)
+            )
+            self._pending_embeddings[cache_key] = pending
+            pending.add_done_callback(lambda _: self._pending_embeddings.pop(cache_key, None))
+
+        # Shielded so one caller going away does not cancel it for the others
+        vector = await asyncio.shield(pending)
+        if self.query_cache.get_vector(cache_key) is None:
+            self.query_cache.put_vector(cache_key, vector)
+        return vector
+
+    def _similarity_search(
+        self,
+        embedding: List[float],
+        document_ids: Optional[List[str]] = None,
+        top_k: Optional[int] = None
+    ) -> List[Document]:
+        """Retrieve the chunks most similar to an embedded question"""
+        k = top_k or self.settings.similarity_top_k
+        return self._get_vectorstore().search(embedding, k, document_ids)
+
+    def _answer_scope(self, document_ids: Optional[List[str]], top_k: Optional[int]) -> tuple:
+        """Part of the answer cache key that depends on what is searched"""
+        return (tuple(sorted(document_ids or ())), top_k or self.settings.similarity_top_k)
+
+    async def _cached_answer(
+        self,
+        question: str,
+        cache_key: str,
+        scope: tuple
+    ) -> Tuple[Optional[Dict], Optional[List[float]]]:
+        """
+        Look up an answer for an exact or semantically similar question
+
+        Returns:
+            The cached answer (or None), and the question's embedding if it
+            had to be computed
+        """
+        answer = self.query_cache.get_answer(cache_key, scope)
+        if answer is not None:
+            return answer, None
+
+        embedding = await self._embed_question(question, cache_key)
+        return self.query_cache.find_similar_answer(embedding, scope), embedding
+
+    def _format_prompt(self, question: str, docs: List[Document]) -> str:
+        """Build the LLM prompt from the retrieved chunks"""
+        context = "\n\n".join([doc.page_content for doc in docs])
+        return self.PROMPT.format(
+            context=context,
+            question=question
+        )
+
+    @staticmethod
+    def _build_sources(docs: List[Document]) -> List[Dict]:
+        """Prepare source references for the retrieved chunks"""
+        return [
+            {
+                "blob_id": doc.metadata.get("walrus_blob_id", ""),
+                # Chunks indexed before excerpts were stored fall back to slicing
+                "excerpt": doc.metadata.get("excerpt") or make_excerpt(doc.page_content),
+                "chunk_index": doc.metadata.get("chunk_index", 0)
+            }
+            for doc in docs
+        ]
+
     async def query_documents(
         self,
         question: str,
@@ -197,60 +658,125 @@ Answer: """
             Answer with sources
         """
         try:
-            k = top_k or self.settings.similarity_top_k
+            cache_key = self.query_cache.key(question)
+            scope = self._answer_scope(document_ids, top_k)
 
-            # Prepare filter
-            search_kwargs = {"k": k}
-            if document_ids:
-                search_kwargs["filter"] = {
-                    "walrus_blob_id": {"$in": document_ids}
-                }
+            cached, embedding = await self._cached_answer(question, cache_key, scope)
+            if cached is not None:
+                return {**cached, "question": question}
 
-            # Perform similarity search
-            vectorstore = self._get_vectorstore()
-            docs = vectorstore.similarity_search(
-                question,
-                **search_kwargs
+            docs = await asyncio.to_thread(
+                self._similarity_search, embedding, document_ids, top_k
             )
 
             if not docs:
-                return {
-                    "answer": "I couldn't find any relevant information in the documents to answer your question.",
+                result = {
+                    "answer": NO_RESULTS_ANSWER,
                     "sources": [],
                     "question": question
                 }
+            else:
+                # Generate answer using LLM, starting the request before
+                # building sources so that work overlaps its latency
+                formatted_prompt = self._format_prompt(question, docs)
 
-            # Build context from retrieved documents
-            context = "\n\n".join([doc.page_content for doc in docs])
+                llm = self._get_llm()
+                answer = (await llm.ainvoke(formatted_prompt)).content
 
-            # Generate answer using LLM
-            formatted_prompt = self.PROMPT.format(
-                context=context,
-                question=question
-            )
+                result = {
+                    "answer": answer,
+                    "sources": self._build_sources(docs),
+                    "question": question
+                }
 
-            llm = self._get_llm()
-            answer = llm.predict(formatted_prompt)
+            self.query_cache.put_answer(cache_key, scope, result)
+            return result
 
-            # Prepare sources
-            sources = []
-            for doc in docs:
-                sources.append({
-                    "blob_id": doc.metadata.get("walrus_blob_id", ""),
-                    "excerpt": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content,
-                    "chunk_index": doc.metadata.get("chunk_index", 0)
-                })
+        except Exception as e:
+            raise Exception(f"Failed to query documents: {str(e)}")
 
-            return {
+    async def _produce_tokens(self, prompt: str, tokens: asyncio.Queue):
+        """Stream LLM answer fragments into a queue, ending with None"""
+        try:
+            async for chunk in self._get_llm().astream(prompt):
+                if chunk.content:
+                    tokens.put_nowait(chunk.content)
+        finally:
+            tokens.put_nowait(None)
+
+    async def stream_query(
+        self,
+        question: str,
+        document_ids: Optional[List[str]] = None,
+        top_k: Optional[int] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Query documents using RAG, streaming the answer as the LLM produces it
+
+        Args:
+            question: User's question
+            document_ids: Optional list of blob IDs to filter
+            top_k: Number of results to return
+
+        Yields:
+            A "sources" event, then one "token" event per answer fragment,
+            then a final "done" event
+        """
+        try:
+            cache_key = self.query_cache.key(question)
+            scope = self._answer_scope(document_ids, top_k)
+
+            cached, embedding = await self._cached_answer(question, cache_key, scope)
+            if cached is not None:
+                yield {"event": "sources", "data": cached["sources"]}
+                yield {"event": "token", "data": cached["answer"]}
+                yield {"event": "done", "data": ""}
+                return
+
+            docs = await asyncio.to_thread(
+                self._similarity_search, embedding, document_ids, top_k
+            )
+
+            if not docs:
+                sources = []
+                yield {"event": "sources", "data": sources}
+                answer = NO_RESULTS_ANSWER
+                yield {"event": "token", "data": answer}
+            else:
+                # Start the LLM request first; building and sending the sources
+                # happens while it waits for the first token
+                formatted_prompt = self._format_prompt(question, docs)
+                tokens: asyncio.Queue = asyncio.Queue()
+                producer = asyncio.create_task(self._produce_tokens(formatted_prompt, tokens))
+                try:
+                    await asyncio.sleep(0)
+                    sources = self._build_sources(docs)
+                    yield {"event": "sources", "data": sources}
+
+                    parts = []
+                    while True:
+                        token = await tokens.get()
+                        if token is None:
+                            break
+                        parts.append(token)
+                        yield {"event": "token", "data": token}
+                    await producer
+                finally:
+                    # Stops the LLM stream if the client went away
+                    producer.cancel()
+                answer = "".join(parts)
+
+            self.query_cache.put_answer(cache_key, scope, {
                 "answer": answer,
                 "sources": sources,
                 "question": question
-            }
+            })
+            yield {"event": "done", "data": ""}
 
         except Exception as e:
             raise Exception(f"Failed to query documents: {str(e)}")
 
-    def delete_document_embeddings(self, blob_id: str) -> Dict:
+    async def delete_document_embeddings(self, blob_id: str) -> Dict:
         """
         Delete all embeddings for a document
 
@@ -263,18 +789,17 @@ Answer: """
         try:
             # Get all documents with this blob_id
             vectorstore = self._get_vectorstore()
-            results = vectorstore.get(
-                where={"walrus_blob_id": blob_id}
-            )
+            ids, _ = await asyncio.to_thread(vectorstore.get_by_blob_id, blob_id)
 
-            if results and 'ids' in results:
+            if ids:
                 # Delete by IDs
-                vectorstore.delete(ids=results['ids'])
-                vectorstore.persist()
+                await asyncio.to_thread(vectorstore.delete, ids)
+                self._schedule_persist()
+                self.query_cache.clear_answers()
 
                 return {
                     "success": True,
-                    "deleted_chunks": len(results['ids'])
+                    "deleted_chunks": len(ids)
                 }
 
             return {
@@ -285,7 +810,47 @@ Answer: """
         except Exception as e:
             raise Exception(f"Failed to delete document embeddings: {str(e)}")
 
-    def get_document_stats(self, blob_id: str) -> Dict:
+    async def reassign_blob_id(self, old_blob_id: str, new_blob_id: str) -> Dict:
+        """
+        Move a document's embeddings from one blob ID to another
+
+        Used when a document is indexed under a provisional key before its
+        Walrus blob ID is known.
+
+        Args:
+            old_blob_id: Blob ID (or provisional key) the chunks are stored under
+            new_blob_id: Walrus blob ID to store them under
+
+        Returns:
+            Update result
+        """
+        try:
+            vectorstore = self._get_vectorstore()
+            ids, metadatas = await asyncio.to_thread(vectorstore.get_by_blob_id, old_blob_id)
+
+            if ids:
+                metadatas = [
+                    {**chunk_metadata, "walrus_blob_id": new_blob_id}
+                    for chunk_metadata in metadatas
+                ]
+                await asyncio.to_thread(vectorstore.update_metadatas, ids, metadatas)
+                self._schedule_persist()
+                self.query_cache.clear_answers()
+
+                return {
+                    "success": True,
+                    "updated_chunks": len(ids)
+                }
+
+            return {
+                "success": True,
+                "updated_chunks": 0
+            }
+
+        except Exception as e:
+            raise Exception(f"Failed to reassign document embeddings: {str(e)}")
+
+    async def get_document_stats(self, blob_id: str) -> Dict:
         """
         Get statistics about a document's embeddings
 
@@ -297,14 +862,12 @@ Answer: """
         """
         try:
             vectorstore = self._get_vectorstore()
-            results = vectorstore.get(
-                where={"walrus_blob_id": blob_id}
-            )
+            ids, _ = await asyncio.to_thread(vectorstore.get_by_blob_id, blob_id)
 
-            if results and 'ids' in results:
+            if ids:
                 return {
                     "blob_id": blob_id,
-                    "total_chunks": len(results['ids']),
+                    "total_chunks": len(ids),
                     "exists": True
                 }
 
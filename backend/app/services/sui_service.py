@@ -1,8 +1,9 @@
 from pysui import SyncClient, SuiConfig
+from pysui.sui.sui_builders.get_builders import GetObjectsOwnedByAddress
 from pysui.sui.sui_txn import SyncTransaction
 from pysui.sui.sui_types.scalars import ObjectID, SuiString
 from pysui.sui.sui_types.address import SuiAddress
-from typing import List, Optional, Dict
+from typing import Iterator, List, Optional, Dict
 from ..config import get_settings
 
 
@@ -105,34 +106,57 @@ class SuiService:
         Returns:
             List of document metadata
         """
+        return list(self.iter_user_documents(wallet_address))
+
+    def iter_user_documents(self, wallet_address: str) -> Iterator[Dict]:
+        """
+        Yield documents owned by a wallet address as their details arrive
+
+        Args:
+            wallet_address: Sui wallet address
+
+        Yields:
+            Document metadata, one document at a time
+        """
         try:
-            # Query owned objects of DocumentAsset type
-            result = self._get_client().get_objects(
-                owner=SuiAddress(wallet_address),
-                object_type=f"{self.package_id}::{self.module_name}::DocumentAsset"
+            client = self._get_client()
+
+            # Filter by type on the node, so the wallet's coins and other
+            # objects are never sent, and only ask for what is read here
+            builder = GetObjectsOwnedByAddress(
+                SuiAddress(wallet_address),
+                query={
+                    "filter": {
+                        "StructType": f"{self.package_id}::{self.module_name}::DocumentAsset"
+                    },
+                    "options": {"showType": True, "showContent": True},
+                },
             )
 
-            documents = []
-            if result.is_ok() and result.result_data:
-                for obj in result.result_data.data:
-                    # Get full object details
-                    obj_result = self._get_client().get_object(obj.object_id)
-
-                    if obj_result.is_ok() and obj_result.result_data:
-                        obj_data = obj_result.result_data
-
-                        if hasattr(obj_data, 'content') and obj_data.content:
-                            fields = obj_data.content.fields
-                            documents.append({
-                                "id": str(obj.object_id),
-                                "name": fields.get("name", ""),
-                                "owner": fields.get("owner", ""),
-                                "walrus_blob_id": fields.get("walrus_blob_id", ""),
-                                "uploaded_at": fields.get("uploaded_at", 0),
-                                "is_public": fields.get("is_public", False),
-                            })
-
-            return documents
+            # Yield each page before requesting the next
+            while True:
+                result = client.execute(builder)
+                if not result.is_ok():
+                    raise Exception(result.result_string)
+                page = result.result_data
+                if not page:
+                    return
+
+                for obj_data in page.data:
+                    if hasattr(obj_data, 'content') and obj_data.content:
+                        fields = obj_data.content.fields
+                        yield {
+                            "id": str(obj_data.object_id),
+                            "name": fields.get("name", ""),
+                            "owner": fields.get("owner", ""),
+                            "walrus_blob_id": fields.get("walrus_blob_id", ""),
+                            "uploaded_at": fields.get("uploaded_at", 0),
+                            "is_public": fields.get("is_public", False),
+                        }
+
+                if not (page.has_next_page and page.next_cursor):
+                    return
+                builder.cursor = page.next_cursor
 
         except Exception as e:
             raise Exception(f"Failed to get user documents: {str(e)}")
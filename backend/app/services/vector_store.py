@@ -0,0 +1,336 @@
+import os
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import orjson
+from langchain_community.vectorstores import Chroma
+from langchain.docstore.document import Document
+
+try:
+    import faiss
+except ImportError:  # Only needed when VECTOR_BACKEND=faiss
+    faiss = None
+
+
+class VectorStoreBackend(ABC):
+    """
+    Storage for chunk embeddings, texts and metadata
+
+    Every chunk carries a `walrus_blob_id` metadata field, which is what
+    searches are filtered by and documents are looked up by. Methods are
+    blocking; RAGService calls them from worker threads.
+    """
+
+    @abstractmethod
+    def add(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict]
+    ):
+        """Store chunks with precomputed embeddings"""
+
+    @abstractmethod
+    def search(
+        self,
+        embedding: List[float],
+        k: int,
+        blob_ids: Optional[List[str]] = None
+    ) -> List[Document]:
+        """Return the k chunks most similar to an embedding, optionally within some blobs"""
+
+    @abstractmethod
+    def get_by_blob_id(self, blob_id: str) -> Tuple[List[str], List[Dict]]:
+        """Return the IDs and metadata of a blob's chunks"""
+
+    @abstractmethod
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict]):
+        """Replace the metadata of existing chunks"""
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        """Remove chunks"""
+
+    @abstractmethod
+    def persist(self):
+        """Write outstanding changes to disk"""
+
+
+class ChromaBackend(VectorStoreBackend):
+    """Vector store backed by a persistent Chroma collection"""
+
+    def __init__(self, vectorstore: Chroma):
+        self.vectorstore = vectorstore
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self.vectorstore._collection.add(
+            ids=ids,
+            embeddings=embeddings,
+            documents=documents,
+            metadatas=metadatas
+        )
+
+    def search(self, embedding, k, blob_ids=None):
+        search_kwargs = {"k": k}
+        if blob_ids:
+            search_kwargs["filter"] = {
+                "walrus_blob_id": {"$in": blob_ids}
+            }
+        return self.vectorstore.similarity_search_by_vector(embedding, **search_kwargs)
+
+    def get_by_blob_id(self, blob_id):
+        results = self.vectorstore.get(where={"walrus_blob_id": blob_id})
+        return results.get("ids") or [], results.get("metadatas") or []
+
+    def update_metadatas(self, ids, metadatas):
+        self.vectorstore._collection.update(ids=ids, metadatas=metadatas)
+
+    def delete(self, ids):
+        self.vectorstore.delete(ids=ids)
+
+    def persist(self):
+        # A no-op with chromadb >= 0.4, whose client writes through on every
+        # call; kept for older clients
+        self.vectorstore.persist()
+
+
+class FAISSBackend(VectorStoreBackend):
+    """
+    Vector store backed by an in-memory FAISS index and SQLite
+
+    Embeddings are L2-normalized float32 vectors in an inner-product index,
+    so scores are cosine similarities. Chunk texts and metadata live in a
+    SQLite table whose integer row IDs are the FAISS vector IDs.
+
+    `index_type` "flat" searches exactly and suits corpora up to ~100K
+    chunks. "hnsw" searches approximately in sublinear time for larger
+    ones, but cannot remove vectors: deleted chunks stay in the index until
+    it is rebuilt and are skipped at search time.
+
+    `quantization` "fp16" or "int8" stores index vectors as 2 or 1 bytes
+    per dimension instead of 4. The full float32 vectors are then kept in a
+    memory-mapped file, and the best `rerank_factor * k` candidates of the
+    quantized search are re-scored exactly against them.
+    """
+
+    INDEX_FILE = "index.faiss"
+    DB_FILE = "chunks.sqlite3"
+    VECTORS_FILE = "vectors.f32"
+
+    def __init__(
+        self,
+        persist_directory: str,
+        index_type: str = "flat",
+        hnsw_m: int = 32,
+        quantization: str = "none",
+        rerank_factor: int = 4
+    ):
+        if faiss is None:
+            raise ImportError("faiss-cpu is required for the FAISS vector store. Install it with `pip install faiss-cpu`.")
+        if index_type not in ("flat", "hnsw"):
+            raise ValueError(f"Unknown FAISS index type: {index_type}")
+        if quantization not in ("none", "fp16", "int8"):
+            raise ValueError(f"Unknown FAISS quantization: {quantization}")
+
+        self.persist_directory = persist_directory
+        self.index_type = index_type
+        self.hnsw_m = hnsw_m
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        self._lock = threading.Lock()
+
+        os.makedirs(persist_directory, exist_ok=True)
+        self._index_path = os.path.join(persist_directory, self.INDEX_FILE)
+        self._index = faiss.read_index(self._index_path) if os.path.exists(self._index_path) else None
+        # float32 copies of quantized vectors, row i holding vector ID i + 1
+        self._vectors_path = os.path.join(persist_directory, self.VECTORS_FILE)
+        self._vectors: Optional[np.memmap] = None
+
+        self._db = sqlite3.connect(
+            os.path.join(persist_directory, self.DB_FILE),
+            check_same_thread=False
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "rowid INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE NOT NULL, "
+            "blob_id TEXT NOT NULL, document TEXT NOT NULL, metadata BLOB NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS chunks_blob_id ON chunks (blob_id)")
+        self._db.commit()
+        self._row_count = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    @property
+    def _quantized(self) -> bool:
+        return self.quantization != "none"
+
+    def _new_index(self, dimension: int):
+        qtype = {
+            "fp16": faiss.ScalarQuantizer.QT_fp16,
+            "int8": faiss.ScalarQuantizer.QT_8bit,
+        }.get(self.quantization)
+
+        if self.index_type == "hnsw":
+            if qtype is None:
+                base = faiss.IndexHNSWFlat(dimension, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            else:
+                base = faiss.IndexHNSWSQ(dimension, qtype, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        elif qtype is None:
+            base = faiss.IndexFlatIP(dimension)
+        else:
+            base = faiss.IndexScalarQuantizer(dimension, qtype, faiss.METRIC_INNER_PRODUCT)
+
+        if not base.is_trained:
+            # Normalized vectors lie in [-1, 1], so fix the int8 range to that
+            # rather than learning it from whichever document is added first
+            bounds = np.array([[-1.0] * dimension, [1.0] * dimension], dtype=np.float32)
+            base.train(bounds)
+        return faiss.IndexIDMap2(base)
+
+    def _store_vectors(self, rowids: np.ndarray, vectors: np.ndarray):
+        """Write float32 vectors at their rows of the rerank file"""
+        mode = "r+b" if os.path.exists(self._vectors_path) else "w+b"
+        with open(self._vectors_path, mode) as f:
+            f.seek((int(rowids[0]) - 1) * vectors.shape[1] * 4)
+            f.write(vectors.tobytes())
+        self._vectors = None
+
+    def _rerank(self, query: np.ndarray, hits: List[int]) -> List[int]:
+        """Order candidates by exact float32 similarity"""
+        if self._vectors is None:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r")
+        vectors = self._vectors.reshape(-1, query.shape[1])
+        scores = vectors[np.array(hits) - 1] @ query[0]
+        return [hits[i] for i in np.argsort(-scores, kind="stable")]
+
+    @staticmethod
+    def _normalized(embeddings) -> np.ndarray:
+        vectors = np.array(embeddings, dtype=np.float32, ndmin=2)
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def add(self, ids, embeddings, documents, metadatas):
+        vectors = self._normalized(embeddings)
+        with self._lock:
+            if self._index is None:
+                self._index = self._new_index(vectors.shape[1])
+
+            # Continue from the AUTOINCREMENT sequence so IDs of deleted
+            # chunks, which may still be in an HNSW index, are never reused
+            row = self._db.execute("SELECT seq FROM sqlite_sequence WHERE name = 'chunks'").fetchone()
+            start = (row[0] if row else 0) + 1
+            rowids = np.arange(start, start + len(ids), dtype=np.int64)
+            self._db.executemany(
+                "INSERT INTO chunks (rowid, id, blob_id, document, metadata) VALUES (?, ?, ?, ?, ?)",
+                zip(
+                    rowids.tolist(),
+                    ids,
+                    (m["walrus_blob_id"] for m in metadatas),
+                    documents,
+                    map(orjson.dumps, metadatas)
+                )
+            )
+            self._index.add_with_ids(vectors, rowids)
+            if self._quantized:
+                self._store_vectors(rowids, vectors)
+            self._row_count += len(ids)
+
+    def _search_params(self, blob_ids: List[str]):
+        """Restrict a search to the chunks of some blobs, or None if they have none"""
+        placeholders = ",".join("?" * len(blob_ids))
+        rowids = np.fromiter(
+            (row[0] for row in self._db.execute(
+                f"SELECT rowid FROM chunks WHERE blob_id IN ({placeholders})", blob_ids
+            )),
+            dtype=np.int64
+        )
+        if not len(rowids):
+            return None
+        selector = faiss.IDSelectorBatch(rowids)
+        if self.index_type == "hnsw":
+            return faiss.SearchParametersHNSW(sel=selector)
+        return faiss.SearchParameters(sel=selector)
+
+    def search(self, embedding, k, blob_ids=None):
+        query = self._normalized(embedding)
+        with self._lock:
+            if self._index is None or not self._index.ntotal:
+                return []
+
+            params = None
+            if blob_ids:
+                params = self._search_params(blob_ids)
+                if params is None:
+                    return []
+
+            # Over-fetch by the vectors of deleted chunks the index still holds
+            stale = max(self._index.ntotal - self._row_count, 0)
+            candidates = k * self.rerank_factor if self._quantized else k
+            _, labels = self._index.search(query, candidates + stale, params=params)
+            hits = [int(label) for label in labels[0] if label != -1]
+            if not hits:
+                return []
+
+            placeholders = ",".join("?" * len(hits))
+            rows = {
+                rowid: (document, metadata)
+                for rowid, document, metadata in self._db.execute(
+                    f"SELECT rowid, document, metadata FROM chunks WHERE rowid IN ({placeholders})", hits
+                )
+            }
+            if self._quantized:
+                hits = self._rerank(query, [rowid for rowid in hits if rowid in rows])
+
+        docs = []
+        for rowid in hits:
+            if rowid in rows:
+                document, metadata = rows[rowid]
+                docs.append(Document(page_content=document, metadata=orjson.loads(metadata)))
+                if len(docs) == k:
+                    break
+        return docs
+
+    def get_by_blob_id(self, blob_id):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, metadata FROM chunks WHERE blob_id = ? ORDER BY rowid", (blob_id,)
+            ).fetchall()
+        return [row[0] for row in rows], [orjson.loads(row[1]) for row in rows]
+
+    def update_metadatas(self, ids, metadatas):
+        with self._lock:
+            self._db.executemany(
+                "UPDATE chunks SET blob_id = ?, metadata = ? WHERE id = ?",
+                zip(
+                    (m["walrus_blob_id"] for m in metadatas),
+                    map(orjson.dumps, metadatas),
+                    ids
+                )
+            )
+
+    def delete(self, ids):
+        with self._lock:
+            placeholders = ",".join("?" * len(ids))
+            rowids = np.fromiter(
+                (row[0] for row in self._db.execute(
+                    f"SELECT rowid FROM chunks WHERE id IN ({placeholders})", ids
+                )),
+                dtype=np.int64
+            )
+            self._db.execute(f"DELETE FROM chunks WHERE id IN ({placeholders})", ids)
+            self._row_count -= len(rowids)
+            if self._index is not None and self.index_type == "flat":
+                self._index.remove_ids(rowids)
+
+    def persist(self):
+        """Commit chunk rows and write the index, replacing the previous file atomically"""
+        with self._lock:
+            self._db.commit()
+            if self._index is None:
+                return
+            tmp_path = f"{self._index_path}.{uuid.uuid4().hex}.tmp"
+            faiss.write_index(self._index, tmp_path)
+            os.replace(tmp_path, self._index_path)
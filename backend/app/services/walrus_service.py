@@ -1,5 +1,8 @@
+import os
+import aiofiles
 import httpx
-from typing import Optional
+import orjson
+from typing import AsyncIterable, AsyncIterator, Optional, Tuple, Union
 from ..config import get_settings
 
 
@@ -11,73 +14,132 @@ class WalrusService:
         self.publisher_url = self.settings.walrus_publisher_url
         self.aggregator_url = self.settings.walrus_aggregator_url
         self.epochs = self.settings.walrus_epochs
+        self._client = None
 
-    async def upload_blob(self, content: bytes) -> dict:
+    def _get_client(self) -> httpx.AsyncClient:
+        """Lazy initialization of the pooled HTTP/2 client shared by all calls"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.settings.http_max_connections,
+                    max_keepalive_connections=self.settings.http_max_keepalive_connections
+                )
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close pooled connections; a later call opens a new client"""
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+    @staticmethod
+    async def _iter_bytes(content: bytes, chunk_size: int) -> AsyncIterator[bytes]:
+        """Yield in-memory content in slices"""
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+
+    @staticmethod
+    async def _iter_file(path: Union[str, os.PathLike], chunk_size: int) -> AsyncIterator[bytes]:
+        """Yield a file on disk in chunks without blocking the event loop"""
+        async with aiofiles.open(path, "rb") as f:
+            while chunk := await f.read(chunk_size):
+                yield chunk
+
+    def _request_body(
+        self,
+        content: Union[bytes, str, os.PathLike, AsyncIterable[bytes]]
+    ) -> Tuple[AsyncIterable[bytes], Optional[int]]:
+        """Turn upload content into a stream of upload_chunk_size pieces and its length, if known"""
+        chunk_size = self.settings.upload_chunk_size
+        if isinstance(content, (bytes, bytearray)):
+            return self._iter_bytes(content, chunk_size), len(content)
+        if isinstance(content, (str, os.PathLike)):
+            return self._iter_file(content, chunk_size), os.path.getsize(content)
+        return content, None
+
+    async def upload_blob(self, content: Union[bytes, str, os.PathLike, AsyncIterable[bytes]]) -> dict:
         """
         Upload content to Walrus storage
 
+        The request body is always streamed in upload_chunk_size pieces, so
+        the whole blob is never copied into a request buffer.
+
         Args:
-            content: File content as bytes
+            content: File content as bytes, a path to a file on disk, or an
+                async iterator of byte chunks (sent with chunked encoding)
 
         Returns:
             dict with blob_id and other metadata
         """
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                # Upload to Walrus
-                response = await client.put(
-                    f"{self.publisher_url}/v1/blobs",
-                    content=content,
-                    params={"epochs": self.epochs},
-                    headers={"Content-Type": "application/octet-stream"}
-                )
-                response.raise_for_status()
-                result = response.json()
-
-                # Handle different response formats
-                if "newlyCreated" in result:
-                    blob_data = result["newlyCreated"]["blobObject"]
-                    return {
-                        "blob_id": blob_data["blobId"],
-                        "sui_ref_type": "newlyCreated",
-                        "certified_epoch": blob_data.get("certifiedEpoch", 0)
-                    }
-                elif "alreadyCertified" in result:
-                    blob_data = result["alreadyCertified"]["blobObject"]
-                    return {
-                        "blob_id": blob_data["blobId"],
-                        "sui_ref_type": "alreadyCertified",
-                        "certified_epoch": blob_data.get("certifiedEpoch", 0)
-                    }
-                else:
-                    raise ValueError(f"Unexpected Walrus response format: {result}")
-
-            except httpx.HTTPError as e:
-                error_msg = str(e) if str(e) else f"HTTP {e.response.status_code if hasattr(e, 'response') and e.response else 'Unknown'}: {e.response.text if hasattr(e, 'response') and e.response else 'No response'}"
-                raise Exception(f"Failed to upload to Walrus: {error_msg}")
-            except Exception as e:
-                raise Exception(f"Failed to upload to Walrus: {str(e) or type(e).__name__}")
-
-    async def download_blob(self, blob_id: str) -> bytes:
+        client = self._get_client()
+        try:
+            body, size = self._request_body(content)
+            headers = {"Content-Type": "application/octet-stream"}
+            if size is not None:
+                headers["Content-Length"] = str(size)
+
+            # Upload to Walrus
+            response = await client.put(
+                f"{self.publisher_url}/v1/blobs",
+                content=body,
+                params={"epochs": self.epochs},
+                headers=headers,
+                timeout=60.0
+            )
+            response.raise_for_status()
+            result = orjson.loads(response.content)
+
+            # Handle different response formats
+            if "newlyCreated" in result:
+                blob_data = result["newlyCreated"]["blobObject"]
+                return {
+                    "blob_id": blob_data["blobId"],
+                    "sui_ref_type": "newlyCreated",
+                    "certified_epoch": blob_data.get("certifiedEpoch", 0)
+                }
+            elif "alreadyCertified" in result:
+                blob_data = result["alreadyCertified"]["blobObject"]
+                return {
+                    "blob_id": blob_data["blobId"],
+                    "sui_ref_type": "alreadyCertified",
+                    "certified_epoch": blob_data.get("certifiedEpoch", 0)
+                }
+            else:
+                raise ValueError(f"Unexpected Walrus response format: {result}")
+
+        except httpx.HTTPError as e:
+            error_msg = str(e) if str(e) else f"HTTP {e.response.status_code if hasattr(e, 'response') and e.response else 'Unknown'}: {e.response.text if hasattr(e, 'response') and e.response else 'No response'}"
+            raise Exception(f"Failed to upload to Walrus: {error_msg}")
+        except Exception as e:
+            raise Exception(f"Failed to upload to Walrus: {str(e) or type(e).__name__}")
+
+    async def stream_blob(self, blob_id: str, chunk_size: int = 65536) -> AsyncIterator[bytes]:
         """
-        Download content from Walrus storage
+        Stream content from Walrus storage without buffering the whole blob
 
         Args:
             blob_id: The blob ID to download
+            chunk_size: Size of the chunks to yield
 
-        Returns:
-            File content as bytes
+        Yields:
+            File content in chunks of bytes
         """
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                response = await client.get(
-                    f"{self.aggregator_url}/v1/blobs/{blob_id}"
-                )
+        client = self._get_client()
+        try:
+            async with client.stream(
+                "GET",
+                f"{self.aggregator_url}/v1/blobs/{blob_id}",
+                timeout=60.0
+            ) as response:
                 response.raise_for_status()
-                return response.content
+                async for chunk in response.aiter_bytes(chunk_size):
+                    yield chunk
 
-            except httpx.HTTPError as e:
-                raise Exception(f"Failed to download from Walrus: {str(e)}")
+        except httpx.HTTPError as e:
+            raise Exception(f"Failed to download from Walrus: {str(e)}")
 
     async def check_blob_status(self, blob_id: str) -> dict:
         """
@@ -89,17 +151,36 @@ class WalrusService:
         Returns:
             dict with status information
         """
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.head(
-                    f"{self.aggregator_url}/v1/blobs/{blob_id}"
-                )
-                return {
-                    "exists": response.status_code == 200,
-                    "status_code": response.status_code
-                }
-            except httpx.HTTPError:
-                return {
-                    "exists": False,
-                    "status_code": None
-                }
+        return await self.head_blob(blob_id)
+
+    async def head_blob(self, blob_id: str) -> dict:
+        """
+        Fetch a blob's status and size without downloading it
+
+        Args:
+            blob_id: The blob ID to check
+
+        Returns:
+            dict with exists, status_code and size (None when the aggregator
+            does not report an unencoded length)
+        """
+        client = self._get_client()
+        try:
+            response = await client.head(
+                f"{self.aggregator_url}/v1/blobs/{blob_id}",
+                timeout=30.0
+            )
+            size = response.headers.get("content-length")
+            if "content-encoding" in response.headers:
+                size = None
+            return {
+                "exists": response.status_code == 200,
+                "status_code": response.status_code,
+                "size": int(size) if size and size.isdigit() else None
+            }
+        except httpx.HTTPError:
+            return {
+                "exists": False,
+                "status_code": None,
+                "size": None
+            }
@@ -10,5 +10,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,  # Enable auto-reload for development
+        loop="uvloop",
+        http="httptools",
         log_level="info"
     )